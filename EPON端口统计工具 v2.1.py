@@ -1,12 +1,20 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import multiprocessing
 import queue
 import os
 import re
+import select
+import socket
+import subprocess
+import sys
 import openpyxl
+from openpyxl.cell import Cell, WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
 import traceback
 from datetime import datetime
 import time
@@ -18,6 +26,85 @@ try:
 except ImportError:
     PARAMIKO_AVAILABLE = False
 
+# 尝试导入parallel-ssh，可用时使用gevent并发采集，否则回退到paramiko线程池采集
+try:
+    from gevent.pool import Pool
+    from pssh.clients import SSHClient as PSSHClient
+    PSSH_AVAILABLE = True
+except ImportError:
+    PSSH_AVAILABLE = False
+
+# 尝试导入xlsxwriter，可用时直接流式写出报表，否则使用openpyxl
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+# 预编译的解析正则
+IP_RE = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})')  # IPv4地址
+ONU_FOUND_RE = re.compile(r'ONUs found:\s*(\d+)')
+SLOT_RE = re.compile(r'dis onu slot\s+(\d+)')
+PON_RE = re.compile(r'Olt\d+/0/(\d+)')
+ONU_STATE_KEYS = {'Up': '在线', 'Offline': '离线', 'Silent': '静默'}  # 倒数第二列的ONU状态
+HEADER_RE = re.compile(r'State|MAC|LOID|LLID|Port')  # 表头行关键字，出现在行内任意位置即跳过
+
+# Excel报表公用样式（样式对象赋值后不可变，可在多个单元格间共享）
+BOLD = Font(bold=True)
+TITLE_FONT = Font(size=14, bold=True)
+NOTE_FONT = Font(size=10)
+CENTER = Alignment(horizontal="center", vertical="center")
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+SLOT_FILL = PatternFill(start_color="FFFDE9D9", fill_type="solid")
+PON_FILL = PatternFill(start_color="FFD9E1F2", fill_type="solid")
+IDLE_FILL = PatternFill(start_color="FFFFFF00", fill_type="solid")
+STATS_FILL = PatternFill(start_color="FFD9D9D9", fill_type="solid")
+
+# 报表单元格样式：样式名对应的字体/填充/对齐/边框，未列出的项沿用默认值
+REPORT_STYLES = {
+    "报表标题": dict(font=TITLE_FONT, alignment=CENTER, border=THIN_BORDER),
+    "合并区域": dict(border=THIN_BORDER),
+    "槽位名称": dict(font=BOLD, fill=SLOT_FILL, alignment=CENTER, border=THIN_BORDER),
+    "PON表头": dict(fill=PON_FILL, alignment=CENTER, border=THIN_BORDER),
+    "数据": dict(alignment=CENTER, border=THIN_BORDER),
+    "空闲": dict(font=BOLD, fill=IDLE_FILL, alignment=CENTER, border=THIN_BORDER),
+    "统计": dict(font=BOLD, fill=STATS_FILL, alignment=CENTER),
+    "备注": dict(font=NOTE_FONT),
+}
+
+# xlsxwriter写入时对应的单元格格式，与REPORT_STYLES逐项一致
+XLSXWRITER_FORMATS = {
+    "报表标题": {'font_size': 14, 'bold': True, 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    "合并区域": {'border': 1},
+    "槽位名称": {'bold': True, 'bg_color': '#FDE9D9', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    "PON表头": {'bg_color': '#D9E1F2', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    "数据": {'align': 'center', 'valign': 'vcenter', 'border': 1},
+    "空闲": {'bold': True, 'bg_color': '#FFFF00', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    "统计": {'bold': True, 'bg_color': '#D9D9D9', 'align': 'center', 'valign': 'vcenter'},
+    "备注": {'font_size': 10},
+}
+
+# 报表布局：每个槽位分奇数、偶数PON口两组，每组5行
+PON_GROUP_ODD = tuple(range(1, 24, 2))
+PON_GROUP_EVEN = tuple(range(2, 25, 2))
+REPORT_ROWS = (("PON", None), ("在线", "在线"), ("离线", "离线"), ("静默", "静默"), ("空闲", "空闲"))
+REPORT_COLUMNS = 2 + len(PON_GROUP_ODD)  # 报表总列数：槽位列、标签列加每组PON口列
+COL_LETTERS = tuple(get_column_letter(col) for col in range(1, 30))  # 列号对应的列字母，下标为列号-1
+
+MAX_LOG_LINES = 5000  # 日志区域最多保留的行数
+LOG_BACKSTOP_MS = 1000  # 日志兜底刷新间隔（毫秒）
+READ_BUFFER_SIZE = 256 * 1024  # 读取数据文件的缓冲区大小
+
+
+def open_folder(path):
+    """用系统文件管理器打开目录"""
+    if sys.platform == 'win32':
+        os.startfile(path)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', path])
+    else:
+        subprocess.Popen(['xdg-open', path])
+
 
 class SSHConnection:
     """SSH连接管理类"""
@@ -29,9 +116,10 @@ class SSHConnection:
         self.password = password
         self.client = None
         self.shell = None
+        self.use_exec = True  # 优先使用exec通道执行单条命令
         
     def connect(self, timeout=10):
-        """建立SSH连接并设置屏幕长度"""
+        """建立SSH连接（交互式shell在设备不支持exec时才创建）"""
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.client.connect(
@@ -43,7 +131,10 @@ class SSHConnection:
             look_for_keys=False,
             allow_agent=False
         )
-        # 创建交互式shell
+        return True
+    
+    def open_shell(self):
+        """创建交互式shell并设置屏幕长度"""
         self.shell = self.client.invoke_shell()
         # 等待初始提示符
         time.sleep(1)
@@ -61,41 +152,73 @@ class SSHConnection:
         return True
     
     def get_full_output(self, cmd, timeout=30):
-        """获取完整命令输出，自动处理分页"""
-        if not self.shell:
+        """获取完整命令输出，优先使用exec通道，不支持时回退到交互式shell"""
+        if not self.client:
             raise Exception("SSH未连接")
         
+        if self.use_exec:
+            try:
+                output = self.exec_output(cmd, timeout)
+                if output:
+                    return output
+            except (paramiko.SSHException, socket.timeout):
+                pass
+            # 设备不支持exec通道，后续命令改用交互式shell
+            self.use_exec = False
+        
+        if not self.shell:
+            self.open_shell()
+        return self.shell_output(cmd, timeout)
+    
+    def iter_slot_outputs(self, slots, timeout=30):
+        """依次返回各槽位的(槽位号, 命令输出)"""
+        # 交互式shell模式下也逐条发送：部分设备收到即回显预输入的命令，批量发送时无法按回显切分输出
+        for slot in slots:
+            yield slot, self.get_full_output(f"dis onu slot {slot}", timeout)
+    
+    def exec_output(self, cmd, timeout=30):
+        """通过exec通道执行单条命令，读到EOF即为完整输出（无pty不分页）"""
+        stdin, stdout, stderr = self.client.exec_command(cmd, timeout=timeout)
+        # 错误提示（如Wrong parameter）可能输出在stderr，一并返回
+        return (stdout.read() + stderr.read()).decode('utf-8', errors='ignore')
+    
+    def shell_output(self, cmd, timeout=30):
+        """通过交互式shell发送命令，自动处理分页，返回完整输出"""
         self.shell.send(cmd + '\n')
         output = ""
         end_time = time.time() + timeout
         last_chunk_time = time.time()
         
-        while time.time() < end_time:
-            if self.shell.recv_ready():
-                chunk = self.shell.recv(65535).decode('utf-8', errors='ignore')
-                output += chunk
-                last_chunk_time = time.time()
-                
-                # 检查是否输出完整（出现ONUs found表示完成）
-                if "ONUs found:" in chunk:
-                    # 再等待一下确保没有更多输出
-                    time.sleep(0.5)
-                    # 清空剩余输出
-                    while self.shell.recv_ready():
-                        output += self.shell.recv(65535).decode('utf-8', errors='ignore')
-                    return output
-                
-                # 检查是否需要继续（分页提示）
-                if "More" in chunk or "----" in chunk[-50:]:
-                    self.shell.send(' ')
-                    time.sleep(0.3)
-                    continue
-                    
-            # 如果5秒内没有新数据，认为输出完成
-            if time.time() - last_chunk_time > 5:
+        while True:
+            # 超时或5秒内没有新数据，认为输出完成
+            wait = min(end_time, last_chunk_time + 5) - time.time()
+            if wait <= 0:
                 break
-                
-            time.sleep(0.1)
+            # 等待通道可读，数据到达即返回
+            readable, _, _ = select.select([self.shell], [], [], wait)
+            if not readable:
+                continue
+            chunk = self.shell.recv(65535)
+            if not chunk:
+                break  # 通道已关闭
+            
+            text = chunk.decode('utf-8', errors='ignore')
+            output += text
+            last_chunk_time = time.time()
+            
+            # 命令回显之后，ONUs found的数量已完整收到或槽位无板卡，即输出完整
+            cmd_start = output.rfind(cmd)
+            if cmd_start >= 0:
+                tail = output[cmd_start:]
+                match = ONU_FOUND_RE.search(tail)
+                if match and match.end() < len(tail):
+                    break
+                if "Wrong parameter" in tail:
+                    break
+            
+            # 检查是否需要继续（分页提示），下一次select会等待新数据
+            if "---- More ----" in text[-40:]:
+                self.shell.send(' ')
         
         return output
     
@@ -122,11 +245,13 @@ class EPONPortAnalyzer:
         self.stop_flag = False  # 停止标志
         self.ssh_thread = None  # SSH线程引用
         self.create_widgets()
-        self.update_log()
+        # 日志由log()触发虚拟事件后批量刷新，不再定时轮询
+        self.root.bind('<<LogMsg>>', lambda event: self.update_log())
+        self.log_backstop()
         
-        # 检查paramiko是否可用
-        if not PARAMIKO_AVAILABLE:
-            self.log("警告: 未安装paramiko库，SSH功能不可用。请运行: pip install paramiko")
+        # 检查SSH库是否可用（paramiko、parallel-ssh任一即可）
+        if not PARAMIKO_AVAILABLE and not PSSH_AVAILABLE:
+            self.log("警告: 未安装paramiko或parallel-ssh库，SSH功能不可用。请运行: pip install paramiko 或 pip install parallel-ssh")
     
     def create_widgets(self):
         # 主框架使用grid布局
@@ -241,7 +366,7 @@ class EPONPortAnalyzer:
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, font=("Consolas", 9))
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, font=("Consolas", 9), undo=False, maxundo=0)
         self.log_text.grid(row=0, column=0, sticky="nsew")
         
         # 底部按钮区域
@@ -287,22 +412,38 @@ class EPONPortAnalyzer:
 
     def log(self, message):
         self.log_queue.put(message)
+        # 通知主线程刷新日志（event_generate可在后台线程调用）
+        try:
+            self.root.event_generate('<<LogMsg>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def log_backstop(self):
+        """低频兜底刷新，防止事件投递失败时日志滞留在队列中"""
+        self.update_log()
+        self.root.after(LOG_BACKSTOP_MS, self.log_backstop)
 
     def update_log(self):
+        """取出队列中的全部日志，合并为一次插入"""
+        lines = []
         try:
             while True:
-                message = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-                self.log_text.see(tk.END)
+                lines.append(self.log_queue.get_nowait())
         except queue.Empty: 
             pass
-        self.root.after(100, self.update_log)
+        if not lines:
+            return
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        self.log_text.insert(tk.END, ''.join(f"[{timestamp}] {message}\n" for message in lines))
+        # 超出上限时一次性删除最早的日志，避免控件无限增长
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
+        self.log_text.see(tk.END)
 
     def parse_device_list(self, text):
         """解析设备列表文本，格式: 设备名-...-IP（IP在最后一组）"""
         devices = []
-        # 匹配IPv4地址的正则
-        ip_pattern = r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
         
         for line in text.strip().split('\n'):
             line = line.strip()
@@ -310,7 +451,7 @@ class EPONPortAnalyzer:
                 continue
             
             # 查找行中的IP地址
-            ip_match = re.search(ip_pattern, line)
+            ip_match = IP_RE.search(line)
             if ip_match:
                 ip = ip_match.group(1)
                 # 设备名是IP之前的所有内容（去掉末尾的横杠）
@@ -326,8 +467,8 @@ class EPONPortAnalyzer:
 
     def start_ssh_collection(self):
         """开始SSH采集"""
-        if not PARAMIKO_AVAILABLE:
-            messagebox.showerror("错误", "未安装paramiko库，无法使用SSH功能。\n请运行: pip install paramiko")
+        if not PARAMIKO_AVAILABLE and not PSSH_AVAILABLE:
+            messagebox.showerror("错误", "未安装paramiko或parallel-ssh库，无法使用SSH功能。\n请运行: pip install paramiko 或 pip install parallel-ssh")
             return
         
         # 获取参数
@@ -385,75 +526,38 @@ class EPONPortAnalyzer:
         self.stop_ssh_btn.config(state=tk.DISABLED)
         self.status_var.set("正在停止...")
 
+    def device_header(self, device_name, ip):
+        """生成设备采集文件的头部信息"""
+        return [
+            f"# 设备: {device_name}\n",
+            f"# IP: {ip}\n",
+            f"# 采集时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            "="*60 + "\n",
+        ]
+
+    def check_slot_output(self, slot, output, prefix=""):
+        """检查槽位命令输出，返回是否需要保存"""
+        # 检查是否无板卡
+        if "Wrong parameter" in output:
+            self.log(f"    {prefix}槽位 {slot} 无板卡，跳过")
+            return False
+        
+        # 检查是否有ONU信息
+        if "ONUs found:" in output:
+            match = ONU_FOUND_RE.search(output)
+            if match:
+                onu_count = match.group(1)
+                self.log(f"    {prefix}槽位 {slot} 发现 {onu_count} 个ONU")
+        return True
+
     def ssh_collection_task(self, devices, username, password, port, output_dir):
         """SSH采集任务（在后台线程中运行）"""
         try:
             total_devices = len(devices)
-            processed_count = 0
-            
-            for idx, (device_name, ip) in enumerate(devices, 1):
-                # 检查是否停止
-                if self.stop_flag:
-                    self.log("采集已停止")
-                    break
-                
-                self.log(f"[{idx}/{total_devices}] 正在连接设备: {device_name} [{ip}]")
-                
-                try:
-                    ssh = SSHConnection(ip, port, username, password)
-                    ssh.connect(timeout=10)
-                    self.log(f"  成功连接到 {device_name}")
-                    
-                    output_buffer = []
-                    output_buffer.append(f"# 设备: {device_name}\n")
-                    output_buffer.append(f"# IP: {ip}\n")
-                    output_buffer.append(f"# 采集时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    output_buffer.append("="*60 + "\n")
-                    
-                    # 执行slot 2-7命令
-                    for slot in range(2, 8):
-                        # 检查是否停止
-                        if self.stop_flag:
-                            self.log("采集已停止")
-                            break
-                        
-                        cmd = f"dis onu slot {slot}"
-                        self.log(f"  执行命令: {cmd}")
-                        
-                        output = ssh.get_full_output(cmd, timeout=30)
-                        
-                        # 检查是否无板卡
-                        if "Wrong parameter" in output:
-                            self.log(f"    槽位 {slot} 无板卡，跳过")
-                            continue
-                        
-                        # 检查是否有ONU信息
-                        if "ONUs found:" in output:
-                            match = re.search(r'ONUs found:\s*(\d+)', output)
-                            if match:
-                                onu_count = match.group(1)
-                                self.log(f"    槽位 {slot} 发现 {onu_count} 个ONU")
-                        
-                        output_buffer.append(f"\n# 命令: {cmd}\n")
-                        output_buffer.append(output)
-                        output_buffer.append("\n" + "-"*60 + "\n")
-                    
-                    # 保存到文件
-                    save_path = os.path.join(output_dir, f"{device_name}.txt")
-                    with open(save_path, 'w', encoding='utf-8') as f:
-                        f.write(''.join(output_buffer))
-                    
-                    self.log(f"  已保存: {save_path}")
-                    ssh.close()
-                    processed_count += 1
-                    
-                except Exception as e:
-                    self.log(f"  设备 {device_name} 连接失败: {str(e)}")
-                    continue
-                
-                # 检查是否停止
-                if self.stop_flag:
-                    break
+            if PSSH_AVAILABLE:
+                processed_count = self.parallel_collection(devices, username, password, port, output_dir)
+            else:
+                processed_count = self.threaded_collection(devices, username, password, port, output_dir)
             
             self.log("="*60)
             if self.stop_flag:
@@ -464,7 +568,8 @@ class EPONPortAnalyzer:
             
             if not self.stop_flag:
                 self.root.after(0, lambda: messagebox.showinfo("完成", f"SSH采集完成！\n共处理 {processed_count} 台设备\n输出目录: {output_dir}"))
-                self.root.after(0, lambda: os.startfile(output_dir))
+                # 在后台线程中打开输出目录，避免阻塞界面
+                threading.Thread(target=open_folder, args=(output_dir,), daemon=True).start()
             
         except Exception as e:
             self.log(f"严重错误: {traceback.format_exc()}")
@@ -474,6 +579,166 @@ class EPONPortAnalyzer:
             self.root.after(0, lambda: self.stop_ssh_btn.config(state=tk.DISABLED))
             self.root.after(0, lambda: self.status_var.set("就绪"))
 
+    def collect_device(self, device_name, ip, username, password, port, output_dir):
+        """使用paramiko采集单台设备（在线程池中运行），返回(设备名, 是否成功, 信息)，停止后未开始的返回None"""
+        # 排队中的任务在停止后不再连接
+        if self.stop_flag:
+            return None
+        
+        self.log(f"正在连接设备: {device_name} [{ip}]")
+        ssh = SSHConnection(ip, port, username, password)
+        part_path = None
+        try:
+            ssh.connect(timeout=10)
+            self.log(f"  成功连接到 {device_name}")
+            
+            # 边采集边写入临时文件（1MB缓冲），不在内存中拼接整台设备的输出；
+            # 全部采集完成后才改为正式文件名，中途失败不留下不完整的数据文件
+            save_path = os.path.join(output_dir, f"{device_name}.txt")
+            part_path = save_path + '.part'
+            with open(part_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                f.writelines(self.device_header(device_name, ip))
+                
+                # 执行slot 2-7命令（设备不支持exec时改用交互式shell逐条发送）
+                for slot, output in ssh.iter_slot_outputs(range(2, 8), timeout=30):
+                    cmd = f"dis onu slot {slot}"
+                    self.log(f"  {device_name} 执行命令: {cmd}")
+                    
+                    if self.check_slot_output(slot, output, prefix=f"{device_name} "):
+                        f.write(f"\n# 命令: {cmd}\n")
+                        f.write(output)
+                        f.write("\n" + "-"*60 + "\n")
+                    
+                    # 检查是否停止
+                    if self.stop_flag:
+                        break
+            os.replace(part_path, save_path)
+            return device_name, True, f"已保存: {save_path}"
+        except Exception as e:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+            return device_name, False, f"连接失败: {str(e)}"
+        finally:
+            ssh.close()
+
+    def threaded_collection(self, devices, username, password, port, output_dir):
+        """使用线程池并发采集设备，返回成功处理的设备数"""
+        total_devices = len(devices)
+        processed_count = 0
+        done_count = 0
+        
+        with ThreadPoolExecutor(max_workers=min(16, total_devices)) as executor:
+            futures = [
+                executor.submit(self.collect_device, device_name, ip, username, password, port, output_dir)
+                for device_name, ip in devices
+            ]
+            stopped = False
+            for future in as_completed(futures):
+                # 停止后被取消或未开始的任务没有结果；已在运行的任务仍会保存文件，继续等待并记录其结果
+                if future.cancelled() or future.result() is None:
+                    continue
+                device_name, ok, message = future.result()
+                done_count += 1
+                self.log(f"[{done_count}/{total_devices}] 设备 {device_name} {message}")
+                if ok:
+                    processed_count += 1
+                
+                # 检查是否停止，取消尚未开始的任务
+                if self.stop_flag and not stopped:
+                    stopped = True
+                    for f in futures:
+                        f.cancel()
+                    self.log("采集已停止")
+        
+        return processed_count
+
+    def parallel_collection(self, devices, username, password, port, output_dir):
+        """使用parallel-ssh并发采集所有设备，返回成功处理的设备数"""
+        self.log(f"使用parallel-ssh并发连接 {len(devices)} 台设备")
+        buffers = [self.device_header(device_name, ip) for device_name, ip in devices]
+        pool = Pool(min(64, len(devices)))
+        
+        def connect(i):
+            # 与paramiko路径一致只用密码认证，避免先尝试agent、密钥耗尽设备的认证重试次数
+            return PSSHClient(devices[i][1], user=username, password=password, port=port,
+                              timeout=10, num_retries=1, allow_agent=False, identity_auth=False)
+        
+        # 每台设备只建立一次连接，整个采集过程复用；失败的设备直接移除，不影响其他设备的连接
+        clients = {}
+        jobs = {i: pool.spawn(connect, i) for i in range(len(devices))}
+        pool.join()
+        for i, job in jobs.items():
+            if job.successful():
+                clients[i] = job.value
+            else:
+                self.log(f"  设备 {devices[i][0]} 连接失败: {str(job.exception)}")
+        
+        def run(i, cmd):
+            # pssh按指定编码严格解码，先用latin-1逐字节无损解码，再还原为字节后与exec_output一样按utf-8忽略错误解码，
+            # 避免非UTF-8字符（如GBK编码的ONU描述）使整台设备采集失败
+            host_output = clients[i].run_command(cmd, read_timeout=30, encoding='latin-1')
+            # 错误提示（如Wrong parameter）可能输出在stderr，一并返回
+            lines = list(host_output.stdout) + list(host_output.stderr)
+            return '\n'.join(lines).encode('latin-1').decode('utf-8', errors='ignore')
+        
+        # 已连接但exec通道执行失败的设备（部分固件只允许交互式会话），稍后改用paramiko逐台采集
+        fallback = []
+        
+        # 执行slot 2-7命令，每条命令在所有设备上并发执行
+        for slot in range(2, 8):
+            # 检查是否停止
+            if self.stop_flag:
+                self.log("采集已停止")
+                break
+            if not clients:
+                break
+            
+            cmd = f"dis onu slot {slot}"
+            self.log(f"执行命令: {cmd}")
+            jobs = {i: pool.spawn(run, i, cmd) for i in clients}
+            pool.join()
+            
+            for i, job in jobs.items():
+                device_name = devices[i][0]
+                # 与SSHConnection一致：exec执行出错或没有任何输出，视为设备不支持exec
+                if not job.successful() or not job.value:
+                    reason = str(job.exception) if job.exception else "无输出"
+                    self.log(f"  设备 {device_name} exec执行失败（{reason}），稍后改用交互式shell采集")
+                    fallback.append(i)
+                    # 释放客户端即断开连接
+                    del clients[i]
+                    continue
+                
+                output = job.value
+                if not self.check_slot_output(slot, output, prefix=f"{device_name} "):
+                    continue
+                buffers[i].append(f"\n# 命令: {cmd}\n")
+                buffers[i].append(output)
+                buffers[i].append("\n" + "-"*60 + "\n")
+        
+        # 所有命令结束后统一保存到文件
+        processed_count = 0
+        for i in clients:
+            device_name = devices[i][0]
+            save_path = os.path.join(output_dir, f"{device_name}.txt")
+            with open(save_path, 'w', encoding='utf-8') as f:
+                f.write(''.join(buffers[i]))
+            self.log(f"  已保存: {save_path}")
+            processed_count += 1
+        clients.clear()
+        
+        # exec失败的设备交给paramiko路径，由SSHConnection回退到交互式shell重新采集
+        if fallback and not self.stop_flag:
+            fallback_devices = [devices[i] for i in fallback]
+            if PARAMIKO_AVAILABLE:
+                self.log(f"改用交互式shell采集 {len(fallback_devices)} 台设备")
+                processed_count += self.threaded_collection(fallback_devices, username, password, port, output_dir)
+            else:
+                for device_name, ip in fallback_devices:
+                    self.log(f"  设备 {device_name} 需要交互式shell采集，请安装paramiko: pip install paramiko")
+        
+        return processed_count
+
     def start_processing(self):
         """开始本地文件处理"""
         input_path = self.input_path_var.get().strip()
@@ -493,157 +758,151 @@ class EPONPortAnalyzer:
     def process_task(self, input_path, output_dir):
         """本地文件处理任务"""
         try:
-            files = [input_path] if os.path.isfile(input_path) else [os.path.join(input_path, f) for f in os.listdir(input_path) if f.lower().endswith('.txt')]
+            if os.path.isfile(input_path):
+                files = [input_path]
+            else:
+                # scandir的目录项自带完整路径和文件类型，无需再拼接路径
+                with os.scandir(input_path) as entries:
+                    files = [entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith('.txt')]
             if not files: 
                 raise ValueError("未找到TXT文件")
 
-            for file_path in files:
-                self.log(f"解析文件: {os.path.basename(file_path)}")
-                slot_data = self.parse_epon_data(file_path)
-                output_filename = os.path.splitext(os.path.basename(file_path))[0] + ".xlsx"
-                self.generate_excel_report(slot_data, os.path.join(output_dir, output_filename))
+            if len(files) == 1:
+                self.log(f"解析文件: {os.path.basename(files[0])}")
+                self.log(f"已生成报表: {process_epon_file(files[0], output_dir)}")
+            else:
+                # 多个文件互不相关，分派到多个进程并行解析、生成报表，绕开GIL；各文件完成时逐个记录
+                self.log(f"共 {len(files)} 个文件，并行解析中...")
+                failed = []
+                with ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+                    futures = {executor.submit(process_epon_file, file_path, output_dir): os.path.basename(file_path)
+                               for file_path in files}
+                    for future in as_completed(futures):
+                        file_name = futures[future]
+                        # 单个文件失败不影响其余文件，继续记录后续完成的结果
+                        try:
+                            self.log(f"解析文件: {file_name} -> 已生成报表: {future.result()}")
+                        except Exception as e:
+                            self.log(f"解析文件: {file_name} 失败: {str(e)}")
+                            failed.append(file_name)
+                if failed:
+                    message = f"{len(failed)} 个文件处理失败: {', '.join(failed)}"
+                    self.log(message)
+                    self.root.after(0, lambda: messagebox.showerror("错误", message))
+                    return
             
             self.log(f"处理完成！")
             self.root.after(0, lambda: messagebox.showinfo("完成", "报表生成完毕。"))
-            self.root.after(0, lambda: os.startfile(output_dir))
+            # 在后台线程中打开输出目录，避免阻塞界面
+            threading.Thread(target=open_folder, args=(output_dir,), daemon=True).start()
         except Exception as e:
             self.log(f"严重错误: {traceback.format_exc()}")
         finally:
             self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL, text="🚀 开始处理并生成Excel"))
             self.root.after(0, lambda: self.status_var.set("就绪"))
 
-    def parse_epon_data(self, file_path):
+    @staticmethod
+    def parse_epon_data(file_path):
         """解析EPON数据文件"""
-        slot_data = {s: {p: {'在线': 0, '离线': 0, '静默': 0} for p in range(1, 25)} for s in range(2, 8)}
-        current_slot, current_pon = None, None
-        content = None
-        for enc in ['utf-8', 'gbk', 'gb2312']:
+        if not os.path.getsize(file_path):
+            raise ValueError("无法读取文件")
+        # 大缓冲区逐行流式读取，不在内存中保留整个文件；按优先级尝试编码，
+        # 解码失败则换下一种编码从头解析；gb18030兼容gbk/gb2312，作为最后的兜底
+        for enc, errors in (('utf-8', 'strict'), ('gbk', 'strict'), ('gb18030', 'replace')):
             try:
-                with open(file_path, 'r', encoding=enc) as f:
-                    content = f.readlines()
-                break
-            except: 
+                with open(file_path, 'r', encoding=enc, errors=errors, buffering=READ_BUFFER_SIZE) as f:
+                    return EPONPortAnalyzer.parse_epon_lines(f)
+            except UnicodeDecodeError:
                 continue
-        if not content: 
-            raise ValueError("无法读取文件")
 
-        for line in content:
-            line = line.strip()
+    @staticmethod
+    def parse_epon_lines(lines):
+        """逐行统计各槽位、PON口的ONU状态"""
+        slot_data = {s: {p: {'在线': 0, '离线': 0, '静默': 0} for p in range(1, 25)} for s in range(2, 8)}
+        current_slot, current_pon = None, None
+        current_counts = None  # 当前槽位、PON口的计数字典
+        # ONU数据行最多，最先判断
+        for line in lines:
+            parts = line.split()
+            if not parts:
+                continue
+            key = ONU_STATE_KEYS.get(parts[-2]) if len(parts) >= 2 else None
+            if key:
+                # 跳过分隔行和表头行
+                if current_counts is not None and not parts[0].startswith('-') and not HEADER_RE.search(line):
+                    current_counts[key] += 1
+                continue
             if 'dis onu slot' in line:
-                match = re.search(r'dis onu slot\s+(\d+)', line)
+                match = SLOT_RE.search(line)
                 if match: 
                     current_slot = int(match.group(1))
+                    # PON口号不在1-24（或尚未出现）时不计数
+                    current_counts = slot_data[current_slot].get(current_pon) if 2 <= current_slot <= 7 else None
                 continue
             if current_slot and 2 <= current_slot <= 7 and 'Olt' in line and '/0/' in line:
-                match = re.search(r'Olt\d+/0/(\d+)', line)
+                match = PON_RE.search(line)
                 if match: 
                     current_pon = int(match.group(1))
-                continue
-            if current_slot and current_pon and line and not line.startswith('-'):
-                if any(k in line for k in ['State', 'MAC', 'LOID', 'LLID', 'Port']): 
-                    continue
-                parts = re.split(r'\s+', line)
-                if len(parts) >= 2:
-                    state = parts[-2]
-                    key = '在线' if state == 'Up' else '离线' if state == 'Offline' else '静默' if state == 'Silent' else None
-                    if key: 
-                        slot_data[current_slot][current_pon][key] += 1
+                    current_counts = slot_data[current_slot].get(current_pon)
         return slot_data
 
-    def generate_excel_report(self, slot_data, output_path):
-        """生成Excel报表"""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "EPON统计报表"
+    @staticmethod
+    def count_idle_pons(slot_data, slots):
+        """统计指定槽位中空闲（无在线ONU）的PON口数量"""
+        return sum(1 for slot_num in slots for pon_data in slot_data[slot_num].values() if pon_data['在线'] == 0)
 
-        # 样式定义
-        color_slot_name = PatternFill(start_color="FDE9D9", fill_type="solid")
-        color_pon_header = PatternFill(start_color="D9E1F2", fill_type="solid")
-        color_idle_yes = PatternFill(start_color="FFFF00", fill_type="solid")
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        center_align = Alignment(horizontal="center", vertical="center")
+    @staticmethod
+    def build_report_layout(slot_data):
+        """计算报表各行内容和合并区域，与写入Excel所用的库无关
 
-        total_idle_count = 0
+        返回(rows, merges)：rows每行为(值, 样式名)列表，空行为[]；
+        merges为(首行, 首列, 末行, 末列)，行列号从1开始
+        """
+        rows, merges = [], []
+        # 合并区域内除左上角外的单元格只需边框（Excel按各单元格边框绘制合并区域外框）
+        merged = (None, "合并区域")
 
         # 1. 标题
-        ws.merge_cells('A1:N1')
-        title_cell = ws['A1']
-        title_cell.value = f"统计信息(生成日期: {datetime.now().strftime('%Y-%m-%d')})"
-        title_cell.font = Font(size=14, bold=True)
-        title_cell.alignment = center_align
-
-        # 2. 列宽
-        ws.column_dimensions['A'].width = 12
-        ws.column_dimensions['B'].width = 8
-        for col in range(3, 15):
-            ws.column_dimensions[get_column_letter(col)].width = 5
+        rows.append([(f"统计信息(生成日期: {datetime.now().strftime('%Y-%m-%d')})", "报表标题")]
+                    + [merged] * (REPORT_COLUMNS - 1))
+        merges.append((1, 1, 1, REPORT_COLUMNS))
 
-        current_row = 2
         slot_names = {2: "2号槽位", 3: "3号槽位", 4: "4号槽位", 5: "5号槽位", 6: "6号槽位", 7: "7号槽位"}
 
-        # 3. 槽位数据循环 - 只处理txt中有数据的槽位
-        for slot_num in range(2, 8):
-            slot_info = slot_data.get(slot_num, {})
-            
-            # 检查该槽位是否有数据（是否有任何PON口有非零值）
-            has_data = False
-            for pon_id in range(1, 25):
-                pon_data = slot_info.get(pon_id, {})
-                if pon_data.get('在线', 0) > 0 or pon_data.get('离线', 0) > 0 or pon_data.get('静默', 0) > 0:
-                    has_data = True
-                    break
-            
-            # 如果该槽位没有数据，跳过不登记
-            if not has_data:
-                continue
-            
-            start_merge_row = current_row
-            
-            for group in [range(1, 24, 2), range(2, 25, 2)]:
-                rows = [("PON", None), ("在线", "在线"), ("离线", "离线"), ("静默", "静默"), ("空闲", "空闲")]
-                for label, data_key in rows:
-                    ws.cell(row=current_row, column=2, value=label).alignment = center_align
-                    for idx, pon_id in enumerate(group, start=3):
-                        cell = ws.cell(row=current_row, column=idx)
-                        cell.alignment = center_align
-                        if label == "PON":
-                            cell.value = pon_id
-                            cell.fill = color_pon_header
-                            ws.cell(row=current_row, column=2).fill = color_pon_header
-                        elif label == "空闲":
-                            is_idle = slot_info.get(pon_id, {}).get('在线', 0) == 0
-                            if is_idle:
-                                cell.value = "是"
-                                cell.fill = color_idle_yes
-                                cell.font = Font(bold=True)
-                                total_idle_count += 1
-                            else:
-                                cell.value = "否"
-                        else:
-                            cell.value = slot_info.get(pon_id, {}).get(data_key, 0)
-                    current_row += 1
-            
-            ws.merge_cells(start_row=start_merge_row, start_column=1, end_row=current_row-1, end_column=1)
-            slot_cell = ws.cell(row=start_merge_row, column=1, value=slot_names[slot_num])
-            slot_cell.alignment = center_align
-            slot_cell.fill = color_slot_name
-            slot_cell.font = Font(bold=True)
-
-        # 4. 给表格主体添加边框
-        for r in range(1, current_row):
-            for c in range(1, 15):
-                ws.cell(row=r, column=c).border = thin_border
-
-        # 5. 统计行
-        current_row += 1
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=14)
-        stat_cell = ws.cell(row=current_row, column=1)
-        stat_cell.value = f"截止{datetime.now().strftime('%Y年%m月%d日')}统计该设备可利用PON口数量：{total_idle_count}"
-        stat_cell.fill = PatternFill(start_color="D9D9D9", fill_type="solid")
-        stat_cell.alignment = center_align
-        stat_cell.font = Font(bold=True)
-
-        # 6. 备注
+        # 只登记txt中有数据的槽位（是否有任何PON口有非零值），遇到第一个非零值即返回
+        # parse_epon_data保证每个槽位、PON口的计数都存在，直接索引
+        slots_with_data = [slot_num for slot_num in range(2, 8)
+                           if any(count for pon_data in slot_data[slot_num].values() for count in pon_data.values())]
+        total_idle_count = EPONPortAnalyzer.count_idle_pons(slot_data, slots_with_data)
+
+        # 2. 槽位数据循环
+        for slot_num in slots_with_data:
+            slot_info = slot_data[slot_num]
+            start_merge_row = len(rows) + 1
+
+            for group in (PON_GROUP_ODD, PON_GROUP_EVEN):
+                # 每组PON口的计数和空闲标记只取一次，供该组各行复用
+                group_info = [slot_info[pon_id] for pon_id in group]
+                idle_flags = [pon_row['在线'] == 0 for pon_row in group_info]
+                for label, data_key in REPORT_ROWS:
+                    # A列槽位名称只写在合并区域的首行
+                    slot_cell = (slot_names[slot_num], "槽位名称") if len(rows) + 1 == start_merge_row else merged
+                    if label == "PON":
+                        row = [(label, "PON表头")] + [(pon_id, "PON表头") for pon_id in group]
+                    elif label == "空闲":
+                        row = [(label, "数据")] + [("是", "空闲") if idle else ("否", "数据") for idle in idle_flags]
+                    else:
+                        row = [(label, "数据")] + [(pon_row[data_key], "数据") for pon_row in group_info]
+                    rows.append([slot_cell] + row)
+
+            merges.append((start_merge_row, 1, len(rows), 1))
+
+        # 3. 统计行
+        rows.append([])
+        rows.append([(f"截止{datetime.now().strftime('%Y年%m月%d日')}统计该设备可利用PON口数量：{total_idle_count}", "统计")])
+        merges.append((len(rows), 1, len(rows), REPORT_COLUMNS))
+
+        # 4. 备注
         notes = [
             "", "备注：",
             "1. 空闲一栏标记为「是」，说明该口下无在线用户。需留意离线和静默数量。",
@@ -651,14 +910,88 @@ class EPONPortAnalyzer:
             "3. 静默：说明有ONU在线但未配置业务，请及时核实并下发配置。",
             "4. 统计结果以发布日期当天为准。"
         ]
-        for note in notes:
-            current_row += 1
-            ws.cell(row=current_row, column=1, value=note).font = Font(size=10)
+        rows.extend([(note, "备注")] for note in notes)
+        return rows, merges
+
+    @staticmethod
+    def generate_excel_report(slot_data, output_path):
+        """生成Excel报表：已安装xlsxwriter时用其写入，否则使用openpyxl"""
+        if XLSXWRITER_AVAILABLE:
+            EPONPortAnalyzer.generate_excel_report_xlsxwriter(slot_data, output_path)
+        else:
+            EPONPortAnalyzer.generate_excel_report_openpyxl(slot_data, output_path)
+
+    @staticmethod
+    def generate_excel_report_openpyxl(slot_data, output_path):
+        """用openpyxl生成Excel报表（只写模式，逐行写入）"""
+        rows, merges = EPONPortAnalyzer.build_report_layout(slot_data)
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("EPON统计报表")
+
+        # 直接使用共享的样式常量，不注册命名样式，避免在Excel的单元格样式库中多出自定义样式；
+        # 每种样式只在模板单元格上设置一次，新单元格复用模板的样式索引，不必逐项赋值
+        style_arrays = {}
+        for name, attrs in REPORT_STYLES.items():
+            template = WriteOnlyCell(ws)
+            for attr, style_obj in attrs.items():
+                setattr(template, attr, style_obj)
+            style_arrays[name] = template._style
+
+        def make_cell(value, style):
+            """创建只写单元格并应用样式"""
+            return Cell(ws, row=1, column=1, value=value, style_array=style_arrays[style])
+
+        # 列宽（只写模式下必须在写入行之前设置）
+        ws.column_dimensions['A'].width = 12
+        ws.column_dimensions['B'].width = 8
+        for col in range(3, REPORT_COLUMNS + 1):
+            ws.column_dimensions[COL_LETTERS[col - 1]].width = 5
+
+        # 布局中只有合并区域的占位单元格没有值；只写单元格在append时立即写出，可共用同一个对象
+        merged_cell = make_cell(None, "合并区域")
+        for row in rows:
+            ws.append([merged_cell if value is None else make_cell(value, style) for value, style in row])
+
+        # 合并区域直接按行列号构造，免去A1坐标字符串的拼接和解析
+        for min_row, min_col, max_row, max_col in merges:
+            ws.merged_cells.add(CellRange(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row))
 
         wb.save(output_path)
 
+    @staticmethod
+    def generate_excel_report_xlsxwriter(slot_data, output_path):
+        """用xlsxwriter生成Excel报表（直接写出XML，没有openpyxl单元格对象的开销）"""
+        rows, merges = EPONPortAnalyzer.build_report_layout(slot_data)
+        with xlsxwriter.Workbook(output_path) as wb:
+            ws = wb.add_worksheet("EPON统计报表")
+            formats = {name: wb.add_format(props) for name, props in XLSXWRITER_FORMATS.items()}
+
+            ws.set_column(0, 0, 12)
+            ws.set_column(1, 1, 8)
+            ws.set_column(2, REPORT_COLUMNS - 1, 5)
+
+            # xlsxwriter行列号从0开始
+            for row_idx, row in enumerate(rows):
+                for col_idx, (value, style) in enumerate(row):
+                    ws.write(row_idx, col_idx, value, formats[style])
+
+            # merge_range会覆盖区域内已写入的单元格，取左上角的值和样式
+            for min_row, min_col, max_row, max_col in merges:
+                value, style = rows[min_row - 1][min_col - 1]
+                ws.merge_range(min_row - 1, min_col - 1, max_row - 1, max_col - 1, value, formats[style])
+
+
+def process_epon_file(file_path, output_dir):
+    """解析单个TXT文件并生成同名Excel报表，返回报表文件名（供子进程调用，须为模块级函数）"""
+    slot_data = EPONPortAnalyzer.parse_epon_data(file_path)
+    output_filename = os.path.splitext(os.path.basename(file_path))[0] + ".xlsx"
+    EPONPortAnalyzer.generate_excel_report(slot_data, os.path.join(output_dir, output_filename))
+    return output_filename
+
 
 if __name__ == "__main__":
+    # 打包为exe后，子进程启动时需由此接管，避免重复打开主界面
+    multiprocessing.freeze_support()
     try:
         from ctypes import windll
         windll.shcore.SetProcessDpiAwareness(1)